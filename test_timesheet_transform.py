@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import openpyxl
+import pandas as pd
+
+from timesheet_transform import build_records_from_timesheet, update_strategie_in_place
+
+
+def _write_strategie(path, sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for name, dates in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append(["DATA", "COMMESSA", "ORE"])
+        for d in dates:
+            ws.append([d, "old", 0])
+    wb.save(path)
+
+
+def _read_sheet(path, name):
+    ws = openpyxl.load_workbook(path)[name]
+    return list(ws.iter_rows(min_row=2, max_col=3, values_only=True))
+
+
+def _agg(surname, *dates):
+    return pd.DataFrame({
+        "DATA": pd.to_datetime(list(dates)),
+        "SURNAME": [surname] * len(dates),
+        "COMMESSA": ["X1"] * len(dates),
+        "ORE": [8.0] * len(dates),
+    })
+
+
+def _write_mapping(path):
+    pd.DataFrame({
+        "Codice": ["I112 - SYS - SA/RC", "Interno"],
+        "Commessa": ["23WP030 Sa-Rc", "MAPPED"],
+    }).to_excel(path, index=False)
+
+
+def test_build_records_expands_and_aggregates(tmp_path):
+    timesheet, mapping = tmp_path / "timesheet.xlsx", tmp_path / "mapping.xlsx"
+    _write_mapping(mapping)
+    with pd.ExcelWriter(timesheet) as writer:
+        pd.DataFrame([
+            {"WeekRange": "03/03/2025 al 09/03/2025", "Autore": "Pietro Fava",
+             "Codice Commessa": "I112 - SYS - SA/RC", "Lunedì": 8, "Martedì": "4\xa0", "Venerdì": 2.5},
+            {"WeekRange": "03/03/2025 al 09/03/2025", "Autore": "Pietro Fava",
+             "Codice Commessa": "X1", "Lunedì": 1, "Martedì": None, "Venerdì": "abc"},
+            {"WeekRange": "bad", "Autore": "Anna Macchi", "Codice Commessa": "X1", "Lunedì": 8},
+        ]).to_excel(writer, sheet_name="Commesse", index=False)
+        # A sheet without "Codice Commessa" uses the sheet name as the code.
+        pd.DataFrame([
+            {"WeekRange": "10/03/2025 al 16/03/2025", "Autore": " Anna  Macchi ", "Domenica": 1},
+        ]).to_excel(writer, sheet_name="Interno", index=False)
+
+    df_agg = build_records_from_timesheet(timesheet, mapping)
+
+    assert list(df_agg.columns) == ["DATA", "SURNAME", "COMMESSA", "ORE"]
+    assert [(d.strftime("%Y-%m-%d"), s, c, o) for d, s, c, o in df_agg.itertuples(index=False)] == [
+        ("2025-03-03", "fava", "23WP030 Sa-Rc; X1", 9.0),
+        ("2025-03-04", "fava", "23WP030 Sa-Rc", 4.0),
+        ("2025-03-07", "fava", "23WP030 Sa-Rc", 2.5),
+        ("2025-03-16", "macchi", "MAPPED", 1.0),
+    ]
+
+
+def test_build_records_blank_week_range(tmp_path):
+    timesheet, mapping = tmp_path / "timesheet.xlsx", tmp_path / "mapping.xlsx"
+    _write_mapping(mapping)
+    pd.DataFrame({
+        "WeekRange": [None, None], "Autore": ["Pietro Fava", "Anna Macchi"], "Lunedì": [8, 4],
+    }).to_excel(timesheet, index=False)
+
+    assert build_records_from_timesheet(timesheet, mapping).empty
+
+
+def test_update_all_datetime_column(tmp_path):
+    path = tmp_path / "strategie.xlsx"
+    days = [datetime(2025, 3, 1) + timedelta(days=i) for i in range(17)]
+    _write_strategie(path, {"Fava": days + [None, None]})
+
+    assert update_strategie_in_place(path, _agg("fava", "2025-03-03")) == 1
+
+    rows = _read_sheet(path, "Fava")
+    assert rows[2][1:] == ("X1", 8)
+    assert all(r[1] in ("old", None) for i, r in enumerate(rows) if i != 2)
+
+
+def test_update_mixed_datetime_and_string_column(tmp_path):
+    path = tmp_path / "strategie.xlsx"
+    _write_strategie(path, {"Fava": [datetime(2025, 3, 3), " 04/03/2025 ", "junk", 5]})
+
+    assert update_strategie_in_place(path, _agg("Fava", "2025-03-03", "2025-03-04")) == 2
+
+    rows = _read_sheet(path, "Fava")
+    assert [r[1] for r in rows] == ["X1", "X1", "old", "old"]
+
+
+def test_update_header_only_sheet(tmp_path):
+    path = tmp_path / "strategie.xlsx"
+    _write_strategie(path, {"Fava": []})
+
+    assert update_strategie_in_place(path, _agg("fava", "2025-03-03")) == 0
+    assert _read_sheet(path, "Fava") == []
@@ -1,11 +1,25 @@
 import os
 import sys
 import traceback
+import numpy as np
 import pandas as pd
 import openpyxl
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from datetime import timedelta
+
+# Use the calamine engine (pandas >= 2.2 with python-calamine installed) for read-only loads;
+# None keeps the pandas default engine (openpyxl in read-only mode for .xlsx).
+try:
+    import python_calamine
+    EXCEL_READ_ENGINE = "calamine" if tuple(int(v) for v in pd.__version__.split(".")[:2]) >= (2, 2) else None
+except ImportError:
+    EXCEL_READ_ENGINE = None
+
+def read_excel_fast(excel_file, sheet_name=0):
+    """
+    Reads an Excel file with the fastest available engine (see EXCEL_READ_ENGINE).
+    """
+    return pd.read_excel(excel_file, sheet_name=sheet_name, engine=EXCEL_READ_ENGINE)
 
 def build_records_from_timesheet(timesheet_file, mapping_file):
     """
@@ -13,20 +27,11 @@ def build_records_from_timesheet(timesheet_file, mapping_file):
     cleans and aggregates data by [DATA, SURNAME] (joining COMMESSA values and summing ORE).
     Surnames are converted to lower-case for case-insensitive matching.
     """
-    # Read mapping file and create a dictionary for commessa mapping.
-    df_map = pd.read_excel(mapping_file)
-    commessa_map = dict(zip(df_map.iloc[:, 0], df_map.iloc[:, 1]))
-
-    # Read all sheets from the timesheet file.
-    sheets_dict = pd.read_excel(timesheet_file, sheet_name=None)
-    df_raw_list = []
-    for sheet_name, df_sheet in sheets_dict.items():
-        if "Codice Commessa" not in df_sheet.columns:
-            df_sheet["Codice Commessa"] = sheet_name
-        df_raw_list.append(df_sheet)
-    
-    # FutureWarning may appear if some sheets are empty.
-    df_raw = pd.concat(df_raw_list, ignore_index=True)
+    # Read mapping file and index it by original code so it can be applied with Series.map.
+    # Later duplicates win, as they did with the previous dict-based mapping.
+    df_map = read_excel_fast(mapping_file)
+    df_map = df_map.drop_duplicates(subset=df_map.columns[0], keep="last")
+    commessa_map = pd.Series(df_map.iloc[:, 1].values, index=df_map.iloc[:, 0].values)
 
     # Define weekday offset map (Italian)
     day_offset = {
@@ -38,61 +43,75 @@ def build_records_from_timesheet(timesheet_file, mapping_file):
         "Sabato": 5,
         "Domenica": 6
     }
-
-    records = []
-    for idx, row in df_raw.iterrows():
-        week_range_str = str(row.get("WeekRange", "")).strip()
-        if " al " not in week_range_str:
-            continue
-        try:
-            start_str, _ = week_range_str.split(" al ")
-            start_date = pd.to_datetime(start_str, dayfirst=True)
-        except Exception as e:
-            print(f"Skipping row {idx} due to date parse error: {e}")
-            continue
-
-        # Map Codice Commessa using the mapping file.
-        codice_commessa = row.get("Codice Commessa", "")
-        commessa_final = commessa_map.get(codice_commessa, codice_commessa)
-
-        # Extract surname from "Autore" (last word) and convert to lower-case.
-        autore = str(row.get("Autore", "")).strip()
-        surname = autore.split()[-1].lower() if autore else "unknown"
-
-        # Process each weekday column.
-        for day_col, offset in day_offset.items():
-            hours = row.get(day_col, 0)
-            # Clean hours value if it's a string (remove non-breaking spaces, extra whitespace).
-            if isinstance(hours, str):
-                cleaned_hours = hours.replace('\xa0', '').strip()
-            else:
-                cleaned_hours = hours
-            try:
-                hours_val = float(cleaned_hours)
-            except Exception as e:
-                hours_val = 0.0
-
-            if pd.notna(hours) and hours_val != 0.0:
-                actual_date = start_date + timedelta(days=offset)
-                records.append({
-                    "DATA": actual_date.date(),  # keep as date (original behavior)
-                    "COMMESSA": commessa_final,
-                    "ORE": hours_val,
-                    "SURNAME": surname
-                })
-
-    if not records:
+    day_cols = list(day_offset)
+    expected_cols = ["WeekRange", "Autore", "Codice Commessa"] + day_cols
+
+    # Read all sheets from the timesheet file and assemble them column by column:
+    # each sheet is normalized to the expected columns (missing ones come back as NaN
+    # and contribute nothing) and the DataFrame is built once from the joined arrays.
+    sheets_dict = read_excel_fast(timesheet_file, sheet_name=None)
+    cols = {col: [] for col in expected_cols}
+    for sheet_name, df_sheet in sheets_dict.items():
+        if "Codice Commessa" not in df_sheet.columns:
+            df_sheet["Codice Commessa"] = sheet_name
+        df_sheet = df_sheet.reindex(columns=expected_cols)
+        for col in expected_cols:
+            cols[col].append(df_sheet[col].to_numpy())
+    df_raw = pd.DataFrame({col: np.concatenate(arrays) for col, arrays in cols.items()})
+
+    # Parse the start date of "DD/MM/YYYY al DD/MM/YYYY" for the whole column at once.
+    week_range = df_raw["WeekRange"].fillna("").astype(str).str.strip()
+    has_range = week_range.str.contains(" al ", regex=False, na=False)
+    start_str = week_range.str.split(" al ", n=1).str[0].where(has_range)
+    df_raw["_start"] = pd.to_datetime(start_str, format="%d/%m/%Y", errors="coerce", cache=True)
+    bad_dates = has_range & df_raw["_start"].isna()
+    if bad_dates.any():
+        print(f"Skipping {int(bad_dates.sum())} rows due to date parse error.")
+    df_raw = df_raw.dropna(subset=["_start"])
+
+    # Map Codice Commessa using the mapping file.
+    df_raw["COMMESSA"] = df_raw["Codice Commessa"].map(commessa_map).fillna(df_raw["Codice Commessa"])
+
+    # Extract surname from "Autore" (last word, split at most once) and convert to lower-case.
+    # Missing or blank authors become "unknown" rather than the string "nan".
+    df_raw["SURNAME"] = (df_raw["Autore"].fillna("UNKNOWN").astype("string").str.strip()
+                         .str.rsplit(n=1).str[-1].str.lower().fillna("unknown"))
+
+    # Clean hours values stored as strings (non-breaking spaces, extra whitespace)
+    # and lay them out as a rows x weekdays float matrix.
+    hours = df_raw[day_cols].apply(
+        lambda col: col if pd.api.types.is_numeric_dtype(col) else pd.to_numeric(
+            col.astype(str).str.replace("\xa0", "", regex=False).str.strip(), errors="coerce")
+    ).to_numpy(dtype="float64")
+
+    # One record per non-zero (timesheet row, weekday) cell, dated start + weekday offset.
+    row_idx, day_idx = np.nonzero(~np.isnan(hours) & (hours != 0.0))
+    if len(row_idx) == 0:
         print("No valid timesheet records found.")
         return pd.DataFrame()  # Return empty DataFrame if no records found.
 
-    df_timesheet = pd.DataFrame(records)
-    # Aggregate by DATA and SURNAME: join unique COMMESSA values and sum ORE.
-    df_agg = df_timesheet.groupby(["DATA", "SURNAME"], as_index=False).agg({
-        "COMMESSA": lambda x: "; ".join(sorted(set(x))),
-        "ORE": "sum"
+    # Build the frame straight from typed column arrays. SURNAME and COMMESSA are
+    # low-cardinality, so they are categorical from the start and group on integer codes.
+    offsets = np.array([day_offset[day_col] for day_col in day_cols], dtype="timedelta64[D]")
+    df_timesheet = pd.DataFrame({
+        "DATA": df_raw["_start"].to_numpy()[row_idx] + offsets[day_idx],
+        "COMMESSA": pd.Categorical(df_raw["COMMESSA"])[row_idx],
+        "ORE": hours[row_idx, day_idx],
+        "SURNAME": pd.Categorical(df_raw["SURNAME"])[row_idx],
     })
-    # Convert DATA to datetime for matching.
-    df_agg["DATA"] = pd.to_datetime(df_agg["DATA"])
+    # Aggregate by DATA and SURNAME: join unique COMMESSA values and sum ORE.
+    # Sorting up front means one groupby serves both columns: its keys come out already
+    # ordered (so it can skip sorting them) and each group's unique() COMMESSA values
+    # are already sorted, leaving only the final join in Python.
+    # observed=True keeps pandas from materializing unused category combinations.
+    keys = ["DATA", "SURNAME"]
+    g = df_timesheet.sort_values(keys + ["COMMESSA"]).groupby(keys, sort=False, observed=True)
+    com_arr = g["COMMESSA"].unique()
+    # DATA stays datetime64 for matching; no object-dtype date round trip.
+    df_agg = pd.DataFrame({
+        "COMMESSA": ["; ".join(a) for a in com_arr.values],
+        "ORE": g["ORE"].sum().values,
+    }, index=com_arr.index).reset_index()
     return df_agg
 
 def update_strategie_in_place(strategie_file, df_agg):
@@ -101,41 +120,54 @@ def update_strategie_in_place(strategie_file, df_agg):
     For each sheet (named for a surname), if a row's DATA value matches an aggregated date,
     update the COMMESSA and ORE cells.
     Surname matching is done in a case-insensitive way.
+    Returns the number of updated rows; the file is only saved when it is non-zero.
     """
     wb = openpyxl.load_workbook(strategie_file)
+    # Split the aggregated data by lower-cased surname once for case-insensitive matching.
+    groups = dict(tuple(df_agg.groupby(df_agg["SURNAME"].str.lower(), sort=False)))
+    updated = 0
     for sheet_name in wb.sheetnames:
         ws = wb[sheet_name]
-        # Compare using lower-case for case-insensitive matching.
-        subset = df_agg[df_agg["SURNAME"].str.lower() == sheet_name.lower()].copy()
-        if subset.empty:
+        subset = groups.get(sheet_name.lower())
+        if subset is None:
             continue
-        subset.set_index("DATA", inplace=True)
-
-        # Iterate through rows of the sheet (assume headers in row 1 and columns A, B, C as DATA, COMMESSA, ORE).
-        for row_cells in ws.iter_rows(min_row=2, max_col=3, values_only=False):
-            date_cell, commessa_cell, ore_cell = row_cells
-
-            cell_value = date_cell.value
-            if isinstance(cell_value, str):
-                try:
-                    cell_value = pd.to_datetime(cell_value).date()
-                except:
-                    continue
-            elif hasattr(cell_value, "date"):
-                cell_value = cell_value.date()
-
-            if cell_value in subset.index.date:
-                match = subset.loc[subset.index.date == cell_value]
-                if isinstance(match, pd.DataFrame) and len(match) > 1:
-                    combined_commessa = "; ".join(sorted(set(match["COMMESSA"])))
-                    combined_ore = match["ORE"].sum()
-                else:
-                    combined_commessa = match["COMMESSA"].values[0]
-                    combined_ore = match["ORE"].values[0]
-                commessa_cell.value = combined_commessa
-                ore_cell.value = combined_ore
-
-    wb.save(strategie_file)
+        subset = subset.set_index("DATA")
+
+        # Normalize the index to midnight once and collapse the aggregated rows into a
+        # Timestamp -> (COMMESSA, ORE) lookup (timestamps on the same day are merged).
+        subset_dates = subset.index.normalize()
+        lookup = {}
+        for d, grp in subset.groupby(subset_dates):
+            lookup[d] = ("; ".join(sorted(set(grp["COMMESSA"]))), float(grp["ORE"].sum()))
+
+        # Read the sheet's DATA column (assume headers in row 1 and columns A, B, C as DATA, COMMESSA, ORE)
+        # into one object array and convert it in a single vectorized call: datetime cells pass
+        # through, string cells are parsed as DD/MM/YYYY and anything else becomes NaT.
+        raw = pd.Series(np.fromiter(
+            (r[0] for r in ws.iter_rows(min_row=2, max_col=1, values_only=True)), dtype=object),
+            dtype=object)
+        raw = raw.map(lambda v: v.strip() if isinstance(v, str) else v)
+        dates = pd.to_datetime(raw, format="%d/%m/%Y", errors="coerce", cache=True).dt.normalize()
+
+        # Intersect the sheet's dates with the aggregated ones and skip the sheet when
+        # nothing overlaps (e.g. a one-week timesheet against a whole-year sheet).
+        matched = np.flatnonzero(dates.isin(list(lookup)))
+        if len(matched) == 0:
+            continue
+
+        # Collect the matched rows' new values, then write them in one batch,
+        # touching only the COMMESSA/ORE values and never the cell styles.
+        updates = [(int(i) + 2,) + lookup[dates.iat[i]] for i in matched]
+
+        for row_idx, commessa, ore in updates:
+            ws.cell(row=row_idx, column=2).value = commessa
+            ws.cell(row=row_idx, column=3).value = ore
+        updated += len(updates)
+
+    # Saving rewrites the whole workbook, so skip it when no cell changed.
+    if updated:
+        wb.save(strategie_file)
+    return updated
 
 def main():
     root = tk.Tk()
@@ -175,8 +207,11 @@ def main():
         return
 
     # Update the StrategieDigitali file in place.
-    update_strategie_in_place(strategie_file, df_agg)
-    messagebox.showinfo("Success", "Update complete. Your StrategieDigitali file has been updated.")
+    updated = update_strategie_in_place(strategie_file, df_agg)
+    if not updated:
+        messagebox.showinfo("No changes", "No matching dates found. Your StrategieDigitali file was not modified.")
+        return
+    messagebox.showinfo("Success", f"Update complete. {updated} rows of your StrategieDigitali file have been updated.")
 
 if __name__ == "__main__":
     try:
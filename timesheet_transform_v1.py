@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 
@@ -33,23 +34,21 @@ commessa_map = {
 # -------------------------------------------------------------------
 # STEP D: Convert the weekly timesheet into day-by-day records
 # -------------------------------------------------------------------
-records = []
+# Day-by-day records are collected column by column (one list per output column).
+dates, commesse, ores, surnames = [], [], [], []
+
+# Parse the start date of every "WeekRange" (e.g. "03/03/2025 al 09/03/2025") in one
+# vectorized call; rows that don't match the "DD/MM/YYYY al DD/MM/YYYY" format get NaT.
+week_range = df_raw.get("WeekRange", pd.Series("", index=df_raw.index)).fillna("").astype(str).str.strip()
+has_range = week_range.str.contains(" al ", regex=False, na=False)
+start_str = week_range.str.split(" al ", n=1).str[0].where(has_range)
+df_raw["_start"] = pd.to_datetime(start_str, format="%d/%m/%Y", errors="coerce", cache=True)
 
 for idx, row in df_raw.iterrows():
-    # 1) Grab the text "WeekRange" (e.g. "03/03/2025 al 09/03/2025")
-    week_range_str = str(row.get("WeekRange", "")).strip()
-    if " al " not in week_range_str:
-        # Skip rows that don't match the "DD/MM/YYYY al DD/MM/YYYY" format
+    # 1) + 2) Take the pre-parsed start date; skip rows without a valid "WeekRange"
+    start_date = row["_start"]
+    if pd.isna(start_date):
         continue
-    
-    # 2) Parse the start/end date from the text
-    try:
-        start_str, end_str = week_range_str.split(" al ")
-        # "dayfirst=True" tells pandas that the format is D/M/YYYY
-        start_date = pd.to_datetime(start_str, dayfirst=True)
-        # end_date = pd.to_datetime(end_str,   dayfirst=True)  # If needed for checking
-    except:
-        continue  # If it fails to parse, skip
 
     # 3) Get the "Codice Commessa" and map it if needed
     codice_commessa = row.get("Codice Commessa", "")
@@ -70,18 +69,21 @@ for idx, row in df_raw.iterrows():
             # The actual date is "start_date + offset days"
             actual_date = start_date + timedelta(days=offset)
             # Build a record for that day
-            records.append({
-                "DATA": actual_date.date(),   # or keep as a Timestamp
-                "COMMESSA": commessa_final,
-                "ORE": float(hours),
-                "SURNAME": surname
-            })
+            dates.append(actual_date.date())   # or keep as a Timestamp
+            commesse.append(commessa_final)
+            ores.append(float(hours))
+            surnames.append(surname)
 
 # -------------------------------------------------------------------
-# STEP E: Convert the list of day-by-day dictionaries into a DataFrame
+# STEP E: Convert the day-by-day column lists into a DataFrame
 #         Then sum up any duplicates (same date, same commessa, same surname).
 # -------------------------------------------------------------------
-df_days = pd.DataFrame(records)
+df_days = pd.DataFrame({
+    "DATA": dates,
+    "COMMESSA": commesse,
+    "ORE": np.asarray(ores, dtype="float64"),
+    "SURNAME": surnames
+})
 df_final = df_days.groupby(["DATA","COMMESSA","SURNAME"], as_index=False).sum("ORE")
 
 # -------------------------------------------------------------------
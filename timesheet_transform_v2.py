@@ -1,5 +1,6 @@
 import os
 import sys
+import numpy as np
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog
@@ -58,19 +59,21 @@ def main():
     # -------------------------------------------------------------------
     # STEP D: Convert the weekly timesheet into day-by-day records
     # -------------------------------------------------------------------
-    records = []
+    # Parse the start date of every "WeekRange" in one vectorized call;
+    # rows that don't match "DD/MM/YYYY al DD/MM/YYYY" get NaT.
+    week_range = df_raw.get("WeekRange", pd.Series("", index=df_raw.index)).fillna("").astype(str).str.strip()
+    has_range = week_range.str.contains(" al ", regex=False, na=False)
+    start_str = week_range.str.split(" al ", n=1).str[0].where(has_range)
+    df_raw["_start"] = pd.to_datetime(start_str, format="%d/%m/%Y", errors="coerce", cache=True)
+    bad_dates = has_range & df_raw["_start"].isna()
+    if bad_dates.any():
+        print(f"Skipping {int(bad_dates.sum())} rows due to date parse error.")
+
+    dates, commesse, ores, surnames = [], [], [], []
     for idx, row in df_raw.iterrows():
-        # 1) Grab the text "WeekRange" (e.g. "03/03/2025 al 09/03/2025")
-        week_range_str = str(row.get("WeekRange", "")).strip()
-        if " al " not in week_range_str:
-            continue
-        
-        # 2) Parse the start date from the text
-        try:
-            start_str, _ = week_range_str.split(" al ")
-            start_date = pd.to_datetime(start_str, dayfirst=True)
-        except Exception as e:
-            print(f"Skipping row {idx} due to date parse error: {e}")
+        # 1) + 2) Take the pre-parsed start date; skip rows without a valid "WeekRange"
+        start_date = row["_start"]
+        if pd.isna(start_date):
             continue
 
         # 3) Get the "Codice Commessa" and map it if needed
@@ -86,17 +89,20 @@ def main():
             hours = row.get(day_col, 0)
             if pd.notna(hours) and float(hours) != 0.0:
                 actual_date = start_date + timedelta(days=offset)
-                records.append({
-                    "DATA": actual_date.date(),
-                    "COMMESSA": commessa_final,
-                    "ORE": float(hours),
-                    "SURNAME": surname
-                })
+                dates.append(actual_date.date())
+                commesse.append(commessa_final)
+                ores.append(float(hours))
+                surnames.append(surname)
 
     # -------------------------------------------------------------------
-    # STEP E: Create a DataFrame from records and group duplicate entries
+    # STEP E: Create a DataFrame from the record columns and group duplicate entries
     # -------------------------------------------------------------------
-    df_days = pd.DataFrame(records)
+    df_days = pd.DataFrame({
+        "DATA": dates,
+        "COMMESSA": commesse,
+        "ORE": np.asarray(ores, dtype="float64"),
+        "SURNAME": surnames
+    })
     df_final = df_days.groupby(["DATA", "COMMESSA", "SURNAME"], as_index=False).sum("ORE")
 
     # -------------------------------------------------------------------
@@ -1,5 +1,6 @@
 import os
 import sys
+import numpy as np
 import pandas as pd
 import openpyxl
 import tkinter as tk
@@ -45,16 +46,20 @@ def build_records_from_timesheet(timesheet_file, mapping_file):
         "Domenica": 6
     }
 
-    records = []
+    # Parse the start date of every "WeekRange" in one vectorized call;
+    # rows that don't match "DD/MM/YYYY al DD/MM/YYYY" get NaT.
+    week_range = df_raw.get("WeekRange", pd.Series("", index=df_raw.index)).fillna("").astype(str).str.strip()
+    has_range = week_range.str.contains(" al ", regex=False, na=False)
+    start_str = week_range.str.split(" al ", n=1).str[0].where(has_range)
+    df_raw["_start"] = pd.to_datetime(start_str, format="%d/%m/%Y", errors="coerce", cache=True)
+    bad_dates = has_range & df_raw["_start"].isna()
+    if bad_dates.any():
+        print(f"Skipping {int(bad_dates.sum())} rows due to date parse error.")
+
+    dates, commesse, ores, surnames = [], [], [], []
     for idx, row in df_raw.iterrows():
-        week_range_str = str(row.get("WeekRange", "")).strip()
-        if " al " not in week_range_str:
-            continue
-        try:
-            start_str, _ = week_range_str.split(" al ")
-            start_date = pd.to_datetime(start_str, dayfirst=True)
-        except Exception as e:
-            print(f"Skipping row {idx} due to date parse error: {e}")
+        start_date = row["_start"]
+        if pd.isna(start_date):
             continue
 
         # Map commessa
@@ -70,29 +75,31 @@ def build_records_from_timesheet(timesheet_file, mapping_file):
             hours = row.get(day_col, 0)
             if pd.notna(hours) and float(hours) != 0.0:
                 actual_date = start_date + timedelta(days=offset)
-                records.append({
-                    "DATA": actual_date.date(),   # or keep as a Timestamp
-                    "COMMESSA": commessa_final,
-                    "ORE": float(hours),
-                    "SURNAME": surname
-                })
-
-    if not records:
+                dates.append(actual_date)
+                commesse.append(commessa_final)
+                ores.append(float(hours))
+                surnames.append(surname)
+
+    if not dates:
         print("No valid timesheet records found.")
         return pd.DataFrame()  # empty
 
-    df_timesheet = pd.DataFrame(records)
+    # Build the frame from typed columns: datetime64 dates, categorical keys.
+    df_timesheet = pd.DataFrame({
+        "DATA": np.asarray(dates, dtype="datetime64[ns]"),
+        "COMMESSA": pd.Categorical(commesse),
+        "ORE": np.asarray(ores, dtype="float64"),
+        "SURNAME": pd.Categorical(surnames)
+    })
 
     # ------------------------
     # Aggregate by [DATA, SURNAME]
     # Combine commesse (unique) and sum ORE
     # ------------------------
-    df_agg = df_timesheet.groupby(["DATA", "SURNAME"], as_index=False).agg({
+    df_agg = df_timesheet.groupby(["DATA", "SURNAME"], as_index=False, observed=True).agg({
         "COMMESSA": lambda x: "; ".join(sorted(set(x))),
         "ORE": "sum"
     })
-    # Convert DATA to datetime for matching
-    df_agg["DATA"] = pd.to_datetime(df_agg["DATA"])
     return df_agg
 
 